@@ -1,13 +1,73 @@
 import streamlit as st
 from PIL import Image
 import io
-import zipfile
 import os
+import multiprocessing
 import html
+import hashlib
+import time
+import functools
+from typing import Any, Dict, Iterator, List, Tuple
 from processor import ImageProcessor
-from utils import format_bytes, get_unique_filename, get_safe_filename_stem, validate_upload_constraints, sanitize_filename
-from tasks import process_image_task
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils import format_bytes, get_unique_filename, get_safe_filename_stem, validate_upload_constraints, sanitize_filename, create_zip_archive, hex_to_rgb
+from tasks import process_image_task, init_worker, exceeds_dimension_limit
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+# Memory cap: each worker can hold a decoded image of up to MAX_IMAGE_DIMENSION^2 RGBA pixels plus
+# intermediate copies, and the pool is shared by every session, so never start more workers than this.
+MAX_POOL_WORKERS = 8
+
+@st.cache_resource(show_spinner=False)
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Returns the process pool shared by all sessions of this server process.
+    """
+    # Spawned workers never inherit the Streamlit server's threads and locks (unlike fork).
+    # Workers are started on demand, so small batches never pay for a full-size pool.
+    # Size the pool by the CPUs this process may actually run on (container cpusets), not the host total.
+    try:
+        max_workers = len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on Windows/macOS
+        max_workers = os.cpu_count() or 1
+    return ProcessPoolExecutor(
+        max_workers=min(MAX_POOL_WORKERS, max_workers),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker
+    )
+
+def submit_to_pool(jobs: List[Tuple[bytes, List[Tuple[str, int]]]], config: Dict[str, Any]) -> Tuple[ProcessPoolExecutor, Dict[Future, List[Tuple[str, int]]]]:
+    """
+    Submits every (content, files) job to the shared pool and returns the executor with its futures.
+    """
+    executor = get_process_pool()
+    try:
+        return executor, {executor.submit(process_image_task, content, config): files for content, files in jobs}
+    except (BrokenProcessPool, RuntimeError):
+        # The cached pool is unusable: an idle worker died (e.g. the OOM killer) or another session shut it down
+        # after a crash. Drop it and retry once on a fresh pool; anything already queued on it is cancelled.
+        executor.shutdown(wait=False, cancel_futures=True)
+        get_process_pool.clear()
+        executor = get_process_pool()
+        return executor, {executor.submit(process_image_task, content, config): files for content, files in jobs}
+
+def iter_completed_results(executor: ProcessPoolExecutor, future_to_files: Dict[Future, List[Tuple[str, int]]]) -> Iterator[Tuple[List[Tuple[str, int]], Dict[str, Any]]]:
+    """
+    Yields (files, result) pairs from pool futures in completion order.
+    """
+    pool_reset = False
+    for future in as_completed(future_to_files):
+        try:
+            result = future.result()
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory). Shut the broken executor down so sessions still holding it
+            # fail fast, then drop it from the cache so the next run starts a fresh pool.
+            if not pool_reset:
+                executor.shutdown(wait=False, cancel_futures=True)
+                get_process_pool.clear()
+                pool_reset = True
+            result = {"success": False, "error": "A worker process crashed while processing this image."}
+        yield future_to_files[future], result
 
 def main():
     st.set_page_config(page_title="Image Processor", layout="wide")
@@ -248,10 +308,8 @@ def main():
     if 'show_clear_toast' not in st.session_state:
         st.session_state.show_clear_toast = False
 
-    if 'zip_data' not in st.session_state:
-        st.session_state.zip_data = None
-    if 'zip_filename' not in st.session_state:
-        st.session_state.zip_filename = None
+    if 'processed_totals' not in st.session_state:
+        st.session_state.processed_totals = None
 
     if uploaded_files:
         st.subheader(f"Processing {len(uploaded_files)} Images")
@@ -265,6 +323,10 @@ def main():
             st.error(f"Upload limit exceeded: {error_msg}")
         elif st.button(f"Process {len(uploaded_files)} Image{'s' if len(uploaded_files) > 1 else ''}", type="primary", icon=":material/auto_fix_high:", help="Click to start processing all uploaded images with the selected settings."):
             processed_images = []
+            # Publish results as they complete (the list is appended in place). If a widget change interrupts
+            # the batch with a rerun, everything finished so far is still shown instead of being discarded.
+            st.session_state.processed_images = processed_images
+            st.session_state.processed_totals = None
             total_files = len(uploaded_files)
             progress_bar = st.progress(0, text=f"Processing 0 of {total_files} images...")
             
@@ -319,8 +381,7 @@ def main():
                 })
 
             if replace_color:
-                tc = trans_color.lstrip('#')
-                rgb_color = tuple(int(tc[i:i+2], 16) for i in (0, 2, 4))
+                rgb_color = hex_to_rgb(trans_color)
                 config['replace_color'] = True
                 config['trans_color_rgb'] = rgb_color
                 config['trans_tolerance'] = trans_tolerance
@@ -338,79 +399,95 @@ def main():
                 config['watermark_text'] = watermark_text
                 config['wm_opacity'] = wm_opacity
                 config['wm_size'] = wm_size
-                wm_c = wm_color.lstrip('#')
-                config['wm_color'] = tuple(int(wm_c[i:i+2], 16) for i in (0, 2, 4))
-
-            # Parallel Processing
-            # Bolt Optimization: Parallelize image processing to improve performance for multiple uploads
-            # Limit the number of worker threads to avoid excessive memory usage when processing many images
-            max_workers = 1
-            if uploaded_files:
-                cpu_count = os.cpu_count() or 1
-                # Cap workers by CPU count, number of files, and a small upper bound to control memory usage
-                max_workers = min(8, cpu_count, len(uploaded_files))
+                config['wm_color'] = hex_to_rgb(wm_color)
 
             with st.spinner("Processing images..."):
 
-                with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                    # We must read file content here because Streamlit's UploadedFile isn't thread-safe for reading across threads
-                    # (or rather, we want to ensure we have the data ready)
-                    files_data = [(f.name, f.size, f.getvalue()) for f in uploaded_files]
-
-                    # Submit tasks
-                    future_to_file = {
-                        executor.submit(process_image_task, content, config): (name, size, content)
-                        for name, size, content in files_data
-                    }
-
-                    completed_count = 0
-                    for future in as_completed(future_to_file):
-                        name, original_bytes_size, content = future_to_file[future]
-                        result = future.result()
-
-                        if result['success']:
-                            processed_images.append({
-                                "name": name,
-                                "original_size": original_bytes_size,
-                                "processed_size": result['processed_size'],
-                                "data": result['data'],
-                                "original_data": content, # Bolt Optimization: Store bytes instead of PIL object
-                                "has_transparency": result['has_transparency'],
-                                "dominant_colors": result.get('dominant_colors'),
-                                "histogram_data": result.get('histogram_data'),
-                                "output_format": config['output_format']
-                            })
-                        else:
-                            st.error(
-                                f"Error processing file '{name}' "
-                                f"(size: {format_bytes(original_bytes_size)}, "
-                                f"output format: {config.get('output_format', 'original')}): "
-                                f"{result['error']}"
-                            )
-
-                        completed_count += 1
-                        progress_bar.progress(completed_count / total_files, text=f"Processed {completed_count} of {total_files} images...")
-
-                # Generate Zip (Bolt Optimization: Cache ZIP generation to eliminate render-blocking I/O)
-                if processed_images:
-                    zip_buffer = io.BytesIO()
-                    with zipfile.ZipFile(zip_buffer, "w") as zf:
-                        for item in processed_images:
-                            # Security: Sanitize filename to prevent zip slip/path traversal
-                            name_stem = get_safe_filename_stem(item['name'])
-                            # Use config['output_format'] to ensure extension matches content
-                            ext = config.get('output_format', 'JPEG').lower()
-                            file_name = f"processed_{name_stem}.{ext}"
-                            zf.writestr(file_name, item['data'])
-
-                    st.session_state.zip_data = zip_buffer.getvalue()
-                    st.session_state.zip_filename = "processed_images.zip"
+                # We must read file content here because Streamlit's UploadedFile can't be shipped to worker processes
+                # Read each upload exactly once; the byte length doubles as the original size.
+                # Bolt Optimization: Identical uploads (e.g. the same file dropped twice) are decoded,
+                # edited and encoded only once; the result is fanned out to every filename sharing it.
+                unique_files = {}
+                rejected_count = 0
+                for f in uploaded_files:
+                    content = f.getvalue()
+                    # Security: Reject oversized images from their headers before they are shipped to a worker
+                    # (Pixel Flood). Only the header is parsed here, so this costs no decode in the UI process.
+                    if exceeds_dimension_limit(content):
+                        st.error(
+                            f"Error processing file '{f.name}' "
+                            f"(size: {format_bytes(len(content))}): "
+                            f"Image dimensions exceed maximum allowed size ({ImageProcessor.MAX_IMAGE_DIMENSION}px)"
+                        )
+                        rejected_count += 1
+                        continue
+                    digest = hashlib.blake2b(content, digest_size=16).digest()
+                    unique_files.setdefault(digest, (content, []))[1].append((f.name, len(content)))
+
+                # Bolt Optimization: Submit the largest payloads first (LPT scheduling) so a big upload queued last
+                # doesn't leave the other workers idle while it finishes. Byte size is a cheap proxy for pixel count.
+                jobs = sorted(unique_files.values(), key=lambda entry: len(entry[0]), reverse=True)
+
+                if jobs:
+                    if len(jobs) == 1:
+                        # Bolt Optimization: A single image gains nothing from the pool; process it inline and skip
+                        # worker start-up (a cold spawn re-imports Pillow) plus the pickling round-trip.
+                        content, files = jobs[0]
+                        completed_results = iter([(files, process_image_task(content, config))])
+                    else:
+                        # Parallel Processing
+                        # Bolt Optimization: Parallelize image processing across worker processes. Enhancements, filters and
+                        # encoder dispatch hold the GIL, so threads serialize on multi-core machines; processes do not.
+                        # process_image_task only takes/returns bytes and plain dicts, so payloads pickle cheaply.
+                        # The pool is created once per server process and reused across clicks.
+                        executor, future_to_files = submit_to_pool(jobs, config)
+                        completed_results = iter_completed_results(executor, future_to_files)
+
+                    completed_count = rejected_count
+                    # Bolt Optimization: Every progress update is a frontend round-trip. With fast encodes these
+                    # dominate, so refresh at most every 100ms (plus once at the end).
+                    last_progress_update = time.monotonic()
+                    for files, result in completed_results:
+                        for name, original_bytes_size in files:
+                            if result['success']:
+                                processed_images.append({
+                                    "name": name,
+                                    # Bolt Optimization: Sanitize once here rather than on every rerun of the results view
+                                    "safe_name": sanitize_filename(name),
+                                    "name_stem": get_safe_filename_stem(name),
+                                    "original_size": original_bytes_size,
+                                    "processed_size": result['processed_size'],
+                                    "data": result['data'],
+                                    "original_preview": result['original_preview'], # Bolt Optimization: Small preview instead of full upload
+                                    "processed_preview": result.get('processed_preview'),
+                                    "has_transparency": result['has_transparency'],
+                                    "dominant_colors": result.get('dominant_colors'),
+                                    "histogram_data": result.get('histogram_data'),
+                                    "output_format": config['output_format']
+                                })
+                            else:
+                                st.error(
+                                    f"Error processing file '{name}' "
+                                    f"(size: {format_bytes(original_bytes_size)}, "
+                                    f"output format: {config.get('output_format', 'original')}): "
+                                    f"{result['error']}"
+                                )
+
+                        completed_count += len(files)
+                        now = time.monotonic()
+                        if now - last_progress_update >= 0.1 or completed_count == total_files:
+                            progress_bar.progress(completed_count / total_files, text=f"Processed {completed_count} of {total_files} images...")
+                            last_progress_update = now
                 else:
-                    st.session_state.zip_data = None
-                    st.session_state.zip_filename = None
-
-                # Store in session state
-                st.session_state.processed_images = processed_images
+                    # Every upload was rejected above; there is nothing to process, so don't start the pool
+                    progress_bar.empty()
+
+                # Bolt Optimization: Totals only change when a new batch is processed, so compute them once
+                # here instead of re-summing every result on each rerun.
+                st.session_state.processed_totals = (
+                    sum(item['original_size'] for item in processed_images),
+                    sum(item['processed_size'] for item in processed_images)
+                )
                 st.toast("Processing Complete!", icon='🎉')
         elif not st.session_state.processed_images:
             st.info("👈 **Configure settings in the sidebar**, then click **Process** above to transform your images.", icon="💡")
@@ -419,14 +496,17 @@ def main():
     if st.session_state.processed_images:
         if st.button("Clear Results", icon=":material/delete:", help="Clear all processed images and start over."):
             st.session_state.processed_images = None
-            st.session_state.zip_data = None
-            st.session_state.zip_filename = None
+            st.session_state.processed_totals = None
             st.session_state.show_clear_toast = True
             st.rerun()
 
-        # Recalculate totals for display
-        total_original_size = sum(item['original_size'] for item in st.session_state.processed_images)
-        total_processed_size = sum(item['processed_size'] for item in st.session_state.processed_images)
+        # Totals are cached when processing finishes; rebuild them only if missing
+        if st.session_state.processed_totals is None:
+            st.session_state.processed_totals = (
+                sum(item['original_size'] for item in st.session_state.processed_images),
+                sum(item['processed_size'] for item in st.session_state.processed_images)
+            )
+        total_original_size, total_processed_size = st.session_state.processed_totals
 
         # Summary Metrics
         col1, col2, col3 = st.columns(3)
@@ -438,76 +518,93 @@ def main():
         savings = (1 - total_processed_size / total_original_size) * 100 if total_original_size > 0 else 0
         col3.metric("Space Savings", f"{savings:.1f}%", delta=f"{savings:.1f}%")
         
-        if st.session_state.zip_data:
-            st.download_button(
-                label="Download All as ZIP",
-                data=st.session_state.zip_data,
-                file_name=st.session_state.zip_filename,
-                mime="application/zip",
-                type="primary",
-                icon=":material/archive:",
-                help="Download all processed images in a single ZIP file."
-            )
+        # Bolt Optimization: Build the ZIP only when the button is clicked (deferred download) instead of
+        # materializing and holding a second copy of every output for the whole session.
+        st.download_button(
+            label="Download All as ZIP",
+            data=functools.partial(create_zip_archive, st.session_state.processed_images),
+            file_name="processed_images.zip",
+            mime="application/zip",
+            type="primary",
+            icon=":material/archive:",
+            help="Download all processed images in a single ZIP file."
+        )
         
         # Individual Previews
+        # Bolt Optimization: One compact table row per file, with the full comparison (images, colors, histogram,
+        # download) rendered only for the selected result. Streamlit ships expander contents even while collapsed,
+        # so a per-item expander list made every rerun send every preview and download payload.
         st.subheader("Detailed Results")
+        summary_rows = []
         for item in st.session_state.processed_images:
-            # Security: Sanitize filename for display and download
-            safe_name = sanitize_filename(item['name'])
-            name_stem = get_safe_filename_stem(item['name'])
-
             orig_size = item['original_size']
             proc_size = item['processed_size']
             savings = (1 - proc_size / orig_size) * 100 if orig_size > 0 else 0
-            rounded_savings = round(savings, 1)
+            summary_rows.append({
+                # Security: Sanitize filename for display and download
+                # (precomputed at processing time; fall back for results stored without them)
+                "File": item.get('safe_name') or sanitize_filename(item['name']),
+                "Original": format_bytes(orig_size),
+                "Processed": format_bytes(proc_size),
+                "Savings": f"{round(savings, 1):.1f}%"
+            })
+        st.dataframe(summary_rows, hide_index=True)
+
+        selected_index = 0
+        if len(summary_rows) > 1:
+            selected_index = st.selectbox(
+                "Show details for",
+                range(len(summary_rows)),
+                format_func=lambda i: summary_rows[i]["File"],
+                help="Pick a file to compare the original and processed versions and download it."
+            )
 
-            label_text = f"{safe_name} ({format_bytes(orig_size)} → {format_bytes(proc_size)})"
-            if rounded_savings != 0:
-                icon = "⬇" if rounded_savings > 0 else "⬆"
-                label_text += f" {icon} {abs(rounded_savings):.1f}%"
+        item = st.session_state.processed_images[selected_index]
+        safe_name = summary_rows[selected_index]["File"]
+        name_stem = item.get('name_stem') or get_safe_filename_stem(item['name'])
+
+        with st.container(border=True):
+            if item.get("has_transparency"):
+                st.caption("ℹ️ Original image has transparency")
+
+            if item.get("dominant_colors"):
+                st.markdown("**Dominant Colors:**")
+                cols = st.columns(len(item["dominant_colors"]))
+                for idx, color in enumerate(item["dominant_colors"]):
+                    with cols[idx]:
+                        st.color_picker(f"Color {idx+1}", color, disabled=True, key=f"c_{name_stem}_{idx}", label_visibility="collapsed")
+                        st.caption(color)
+
+            if item.get("histogram_data"):
+                st.markdown("**RGB Histogram:**")
+                st.line_chart(item["histogram_data"])
+
+            col1, col2 = st.columns(2)
+            with col1:
+                st.image(item['original_preview'], caption=f"Original ({format_bytes(item['original_size'])})")
+            with col2:
+                # Bolt: Use pre-encoded preview bytes instead of a PIL object to avoid re-encoding overhead.
+                # SVG requires specific handling for display
+                if item.get("data").startswith(b"<svg") or item.get("data").startswith(b"<?xml"):
+                        # Render SVG directly using markdown because st.image doesn't support SVG bytes directly
+                        import base64
+                        b64 = base64.b64encode(item['data']).decode("utf-8")
+                        safe_alt = html.escape(safe_name)
+                        html_content = f'<img src="data:image/svg+xml;base64,{b64}" width="100%" alt="Processed SVG version of {safe_alt}" title="Processed SVG: {safe_alt}"/>'
+                        st.markdown(html_content, unsafe_allow_html=True)
+                        st.caption(f"Processed ({format_bytes(item['processed_size'])})")
+                else:
+                    st.image(item.get('processed_preview') or item['data'], caption=f"Processed ({format_bytes(item['processed_size'])})")
 
-            with st.expander(label_text, icon=":material/image:"):
-                if item.get("has_transparency"):
-                    st.caption("ℹ️ Original image has transparency")
-                
-                if item.get("dominant_colors"):
-                    st.markdown("**Dominant Colors:**")
-                    cols = st.columns(len(item["dominant_colors"]))
-                    for idx, color in enumerate(item["dominant_colors"]):
-                        with cols[idx]:
-                            st.color_picker(f"Color {idx+1}", color, disabled=True, key=f"c_{name_stem}_{idx}", label_visibility="collapsed")
-                            st.caption(color)
-
-                if item.get("histogram_data"):
-                    st.markdown("**RGB Histogram:**")
-                    st.line_chart(item["histogram_data"])
-
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.image(item['original_data'], caption=f"Original ({format_bytes(item['original_size'])})")
-                with col2:
-                    # Bolt: Use raw bytes ('data') instead of PIL object ('image') to avoid re-encoding overhead.
-                    # SVG requires specific handling for display
-                    if item.get("data").startswith(b"<svg") or item.get("data").startswith(b"<?xml"):
-                            # Render SVG directly using markdown because st.image doesn't support SVG bytes directly
-                            import base64
-                            b64 = base64.b64encode(item['data']).decode("utf-8")
-                            safe_alt = html.escape(safe_name)
-                            html_content = f'<img src="data:image/svg+xml;base64,{b64}" width="100%" alt="Processed SVG version of {safe_alt}" title="Processed SVG: {safe_alt}"/>'
-                            st.markdown(html_content, unsafe_allow_html=True)
-                            st.caption(f"Processed ({format_bytes(item['processed_size'])})")
-                    else:
-                        st.image(item['data'], caption=f"Processed ({format_bytes(item['processed_size'])})")
-                
-                item_format = item.get('output_format', output_format).lower()
-                st.download_button(
-                    label=f"Download {safe_name}",
-                    data=item['data'],
-                    file_name=f"processed_{name_stem}.{item_format}",
-                    mime=f"image/{item_format}",
-                    icon=":material/download:",
-                    help=f"Download {safe_name}"
-                )
+            item_format = item.get('output_format', output_format).lower()
+            st.download_button(
+                label=f"Download {safe_name}",
+                data=item['data'],
+                file_name=f"processed_{name_stem}.{item_format}",
+                mime=f"image/{item_format}",
+                icon=":material/download:",
+                help=f"Download {safe_name}"
+            )
 
     if not uploaded_files and not st.session_state.processed_images:
         st.markdown("### 👋 Welcome to Image Processor!")
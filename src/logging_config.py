@@ -15,7 +15,7 @@ def setup_logging(log_file="app.log", level=logging.INFO):
     if not logger.handlers:
         # File handler - use RotatingFileHandler to prevent unbounded log growth (Disk Exhaustion DoS)
         file_handler = logging.handlers.RotatingFileHandler(
-            log_file, maxBytes=10*1024*1024, backupCount=5
+            log_file, maxBytes=10*1024*1024, backupCount=5, delay=True
         )
         file_handler.setLevel(level)
         file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -30,3 +30,26 @@ def setup_logging(log_file="app.log", level=logging.INFO):
         logger.addHandler(console_handler)
 
     return logger
+
+def setup_worker_logging(level=logging.INFO):
+    """
+    Sets up logging inside a process pool worker.
+
+    RotatingFileHandler is not safe across processes (concurrent rollovers lose or duplicate records),
+    so only the parent process writes the log file; workers log to stderr.
+    """
+    logger = logging.getLogger("ImageProcessor")
+    logger.setLevel(level)
+
+    # Importing tasks in the worker already attached the parent's handlers; the file is never opened (delay=True)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+
+    console_handler = logging.StreamHandler(sys.stderr)
+    console_handler.setLevel(level)
+    console_formatter = logging.Formatter('%(process)d - %(name)s - %(levelname)s - %(message)s')
+    console_handler.setFormatter(console_formatter)
+    logger.addHandler(console_handler)
+
+    return logger
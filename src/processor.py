@@ -1,5 +1,6 @@
 from PIL import Image, ImageOps, ImageEnhance, ImageFilter, ImageChops, ImageFilter, ImageDraw, ImageFont
 import io
+import functools
 import pillow_avif
 import pillow_heif
 from typing import List, Tuple, Optional, Union, Dict, Any
@@ -13,22 +14,42 @@ Image.MAX_IMAGE_PIXELS = 6000 ** 2
 class ImageProcessor:
     # Reduced from 10000 to 6000 to prevent DoS via memory exhaustion (Pixel Flood)
     MAX_IMAGE_DIMENSION = 6000
+    # Longest edge of the on-screen previews shown next to each result
+    PREVIEW_MAX_SIZE = 1024
+    # Filter for user-requested resizes. BICUBIC is noticeably faster at a small sharpness cost.
+    RESAMPLING_FILTER = Image.Resampling.LANCZOS
+    # Modes that carry an alpha band (including premultiplied variants)
+    _ALPHA_MODES = frozenset(('RGBA', 'LA', 'PA', 'RGBa', 'La'))
+    # Single transpose equivalent to (clockwise rotation, then optional horizontal flip).
+    # rotate parameter is clockwise degrees: rotate(-90) == ROTATE_270, rotate(-270) == ROTATE_90
+    _TRANSPOSE_OPS = {
+        (0, False): None,
+        (0, True): Image.Transpose.FLIP_LEFT_RIGHT,
+        (90, False): Image.Transpose.ROTATE_270,
+        (90, True): Image.Transpose.TRANSPOSE,
+        (180, False): Image.Transpose.ROTATE_180,
+        (180, True): Image.Transpose.FLIP_TOP_BOTTOM,
+        (270, False): Image.Transpose.ROTATE_90,
+        (270, True): Image.Transpose.TRANSVERSE,
+    }
 
     @staticmethod
     def center_crop_to_aspect(image: Image.Image, target_w: int, target_h: int) -> Image.Image:
         w, h = image.size
         if target_w <= 0 or target_h <= 0:
             return image
-        target_ratio = target_w / target_h
-        current_ratio = w / h
-        if current_ratio > target_ratio:
-            new_w = int(h * target_ratio)
+        # Compare ratios by cross-multiplying: exact integer math, no float rounding on large images
+        if w * target_h == h * target_w:
+            # Already the requested aspect ratio; skip the crop (and its copy)
+            return image
+        if w * target_h > h * target_w:
+            new_w = (h * target_w) // target_h
             left = (w - new_w) // 2
             right = left + new_w
             top = 0
             bottom = h
         else:
-            new_h = int(w / target_ratio)
+            new_h = (w * target_h) // target_w
             top = (h - new_h) // 2
             bottom = top + new_h
             left = 0
@@ -113,6 +134,20 @@ class ImageProcessor:
         colors = [f'#{palette[i]:02x}{palette[i+1]:02x}{palette[i+2]:02x}' for i in range(0, len(palette), 3)]
         return colors
 
+    @staticmethod
+    @functools.lru_cache(maxsize=32)
+    def _load_default_font(font_size: int) -> Union[ImageFont.FreeTypeFont, ImageFont.ImageFont]:
+        """
+        Loads Pillow's bundled font at the given size. Cached: parsing the font file costs far more
+        than drawing a short watermark, and the font object is never mutated.
+        """
+        # Load font (try to load default with size, fallback to default)
+        try:
+            return ImageFont.load_default(size=font_size)
+        except TypeError:
+            # Fallback for older Pillow versions
+            return ImageFont.load_default()
+
     @staticmethod
     def add_watermark(image: Image.Image, text: str, opacity: int = 128, font_size: int = 30, color: Tuple[int, int, int] = (255, 255, 255)) -> Image.Image:
         """
@@ -126,14 +161,13 @@ class ImageProcessor:
             
         # Bolt Optimization: If we are modifying in place (via alpha_composite or paste), we should technically copy first
         # to remain consistent with pure function behavior if existing code relies on immutability.
-        image = image.copy()
+        if image.mode in ('P', '1'):
+            # Palette or binary modes would destroy the watermark colors; convert to RGB, which already yields a copy
+            image = image.convert('RGB')
+        else:
+            image = image.copy()
             
-        # Load font (try to load default with size, fallback to default)
-        try:
-            font = ImageFont.load_default(size=font_size)
-        except TypeError:
-            # Fallback for older Pillow versions
-            font = ImageFont.load_default()
+        font = ImageProcessor._load_default_font(font_size)
 
         # Calculate text size using getbbox (left, top, right, bottom)
         # Use a dummy draw context to measure text
@@ -162,9 +196,6 @@ class ImageProcessor:
         # and back just to blend the small transparent text layer. We can use paste() with the text layer as a mask.
         # This eliminates two O(pixels) memory allocations and full image processing passes for RGB/L images.
         if image.mode != 'RGBA':
-            # Fallback for palette or binary modes: convert to RGB first so the watermark colors aren't destroyed
-            if image.mode in ['P', '1']:
-                image = image.convert('RGB')
             image.paste(txt_layer, (x, y), mask=txt_layer)
         else:
             image.alpha_composite(txt_layer, dest=(x, y))
@@ -197,17 +228,33 @@ class ImageProcessor:
         """
         Applies color and sharpness enhancements to the image.
         """
-        if brightness != 1.0:
-            enhancer = ImageEnhance.Brightness(image)
-            image = enhancer.enhance(brightness)
-        
-        if contrast != 1.0:
-            enhancer = ImageEnhance.Contrast(image)
-            image = enhancer.enhance(contrast)
+        if brightness == contrast == sharpness == saturation == 1.0:
+            return image
+
+        if image.mode in ('L', 'RGB', 'RGBA'):
+            # Bolt Optimization: Brightness and contrast are both per-channel point functions, so compose them into
+            # a single lookup table applied in one pass. ImageEnhance would allocate a solid "degenerate" image,
+            # an 'L' copy for the contrast mean and a blended result for each step.
+            if brightness != 1.0 or contrast != 1.0:
+                image = image.point(ImageProcessor._brightness_contrast_lut(image, brightness, contrast))
+
+            # Bolt Optimization: Saturation is a linear blend with the pixel's luma, i.e. a 3x3 color matrix.
+            # Pillow applies that in one C pass instead of convert('L') + convert back + blend.
+            # (Saturation has no effect on grayscale images.)
+            if saturation != 1.0 and image.mode != 'L':
+                image = ImageProcessor._apply_saturation_matrix(image, saturation)
+        else:
+            if brightness != 1.0:
+                enhancer = ImageEnhance.Brightness(image)
+                image = enhancer.enhance(brightness)
+
+            if contrast != 1.0:
+                enhancer = ImageEnhance.Contrast(image)
+                image = enhancer.enhance(contrast)
 
-        if saturation != 1.0:
-            enhancer = ImageEnhance.Color(image)
-            image = enhancer.enhance(saturation)
+            if saturation != 1.0:
+                enhancer = ImageEnhance.Color(image)
+                image = enhancer.enhance(saturation)
             
         if sharpness != 1.0:
             enhancer = ImageEnhance.Sharpness(image)
@@ -215,6 +262,53 @@ class ImageProcessor:
             
         return image
 
+    @staticmethod
+    def _brightness_contrast_lut(image: Image.Image, brightness: float, contrast: float) -> List[int]:
+        """
+        Builds a point() table equivalent to ImageEnhance.Brightness followed by ImageEnhance.Contrast.
+        """
+        # Same truncation and clipping as Pillow's blend()
+        lut = [min(255, int(v * brightness)) for v in range(256)]
+
+        if contrast != 1.0:
+            # Contrast pivots on the mean luma of the brightened image. Derive it from the histogram
+            # (one C pass, no intermediate image) using the ITU-R 601-2 weights of convert('L').
+            hist = image.histogram()
+            pixel_count = image.width * image.height
+            weights = (1.0,) if image.mode == 'L' else (0.299, 0.587, 0.114)
+            mean = 0.0
+            for band, weight in enumerate(weights):
+                band_hist = hist[band * 256:(band + 1) * 256]
+                mean += weight * sum(lut[v] * count for v, count in enumerate(band_hist)) / pixel_count
+            mean = int(mean + 0.5)
+            lut = [max(0, min(255, int(mean + contrast * (v - mean)))) for v in lut]
+
+        if image.mode == 'L':
+            return lut
+        # Alpha passes through unchanged
+        return lut * 3 + (list(range(256)) if image.mode == 'RGBA' else [])
+
+    @staticmethod
+    def _apply_saturation_matrix(image: Image.Image, saturation: float) -> Image.Image:
+        """
+        Equivalent of ImageEnhance.Color for RGB/RGBA images, as a single color-matrix conversion.
+        """
+        # out = luma + saturation * (in - luma), with luma = 0.299 R + 0.587 G + 0.114 B
+        rest = 1.0 - saturation
+        r, g, b = 0.299 * rest, 0.587 * rest, 0.114 * rest
+        matrix = (
+            r + saturation, g, b, 0,
+            r, g + saturation, b, 0,
+            r, g, b + saturation, 0,
+        )
+        if image.mode == 'RGBA':
+            # Matrix conversion only accepts RGB input; carry the alpha band across
+            alpha = image.getchannel('A')
+            image = image.convert('RGB').convert('RGB', matrix)
+            image.putalpha(alpha)
+            return image
+        return image.convert('RGB', matrix)
+
     @staticmethod
     def apply_transforms(image: Image.Image, rotate: int = 0, flip_horizontal: bool = False, flip_vertical: bool = False, grayscale: bool = False) -> Image.Image:
         """
@@ -223,27 +317,29 @@ class ImageProcessor:
         if grayscale:
             image = image.convert('L') # Bolt Optimization: Return 'L' mode directly to save memory (1/3 size) and speed up subsequent ops
 
-        if rotate != 0:
+        # Normalize so equivalent angles such as -90 or 450 still take the lossless transpose path
+        rotate %= 360
+        if rotate in (0, 90, 180, 270):
             # Bolt Optimization: Use transpose for 90-degree rotations instead of rotate(expand=True).
             # Transpose uses optimized C-level memory swapping which is ~2.5x faster than rotate's affine transformation
             # and avoids sub-pixel artifacts.
-            # rotate parameter is clockwise degrees (90, 180, 270).
-            # rotate(-90) == ROTATE_270, rotate(-180) == ROTATE_180, rotate(-270) == ROTATE_90
-            if rotate == 90:
-                image = image.transpose(Image.Transpose.ROTATE_270)
-            elif rotate == 180:
-                image = image.transpose(Image.Transpose.ROTATE_180)
-            elif rotate == 270:
-                image = image.transpose(Image.Transpose.ROTATE_90)
-            else:
-                # Fallback for non-90 degree multiples (though app.py only allows 0, 90, 180, 270)
-                image = image.rotate(-rotate, expand=True)
+            # Bolt Optimization: A quarter-turn rotation followed by any flips is one of the 8 symmetries of a
+            # rectangle, so apply it as a single transpose instead of up to three full-image copies.
+            # A vertical flip equals a horizontal flip plus a half turn; two flips cancel into a half turn.
+            if flip_vertical:
+                rotate = (rotate + 180) % 360
+            operation = ImageProcessor._TRANSPOSE_OPS[(rotate, flip_horizontal != flip_vertical)]
+            if operation is not None:
+                image = image.transpose(operation)
+        else:
+            # Fallback for non-90 degree multiples (though app.py only allows 0, 90, 180, 270)
+            image = image.rotate(-rotate, expand=True)
 
-        if flip_horizontal:
-            image = image.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
-            
-        if flip_vertical:
-            image = image.transpose(Image.Transpose.FLIP_TOP_BOTTOM)
+            if flip_horizontal:
+                image = image.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+
+            if flip_vertical:
+                image = image.transpose(Image.Transpose.FLIP_TOP_BOTTOM)
             
         return image
 
@@ -266,7 +362,8 @@ class ImageProcessor:
                 if width > ImageProcessor.MAX_IMAGE_DIMENSION or height > ImageProcessor.MAX_IMAGE_DIMENSION:
                      raise ValueError(f"Target dimensions exceed maximum allowed size ({ImageProcessor.MAX_IMAGE_DIMENSION}px)")
 
-                image.thumbnail((width, height), Image.Resampling.LANCZOS)
+                # (thumbnail applies the same reduce() prefilter via its default reducing_gap=2.0)
+                image.thumbnail((width, height), ImageProcessor.RESAMPLING_FILTER)
                 return image
             else:
                 new_width = width
@@ -286,11 +383,15 @@ class ImageProcessor:
         if new_width > ImageProcessor.MAX_IMAGE_DIMENSION or new_height > ImageProcessor.MAX_IMAGE_DIMENSION:
             raise ValueError(f"Resulting image dimensions ({new_width}x{new_height}) exceed maximum allowed size ({ImageProcessor.MAX_IMAGE_DIMENSION}px)")
 
+        if (new_width, new_height) == (original_width, original_height):
+            # e.g. 100%, or a fixed size equal to the current one: nothing to resample
+            return image
+
         # Bolt Optimization: When downscaling significantly, use reducing_gap=2.0
-        # This performs a fast nearest-neighbor reduction by an integer factor before applying the high-quality Lanczos filter.
+        # Pillow first runs Image.reduce() (an integer-factor box average) before applying the high-quality Lanczos filter.
         # It yields a ~3-4x speedup for large downscales with identical visual quality.
         # It has no effect if the image is being upscaled or downscaled slightly.
-        return image.resize((new_width, new_height), Image.Resampling.LANCZOS, reducing_gap=2.0)
+        return image.resize((new_width, new_height), ImageProcessor.RESAMPLING_FILTER, reducing_gap=2.0)
 
     @staticmethod
     def crop_image(image: Image.Image, left: int, top: int, right: int, bottom: int) -> Image.Image:
@@ -304,9 +405,8 @@ class ImageProcessor:
         """
         Checks if the image has transparency (alpha channel or transparency info).
         """
-        if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
-            return True
-        return False
+        mode = image.mode
+        return mode in ImageProcessor._ALPHA_MODES or (mode == 'P' and 'transparency' in image.info)
 
     @staticmethod
     def replace_color_with_transparency(image: Image.Image, target_color: Tuple[int, int, int], tolerance: int = 0) -> Image.Image:
@@ -317,10 +417,16 @@ class ImageProcessor:
         target_color: tuple (R, G, B)
         tolerance: int (0-255)
         """
-        image = image.convert("RGBA")
-        
-        # Split channels
-        r, g, b, a = image.split()
+        # Bolt Optimization: Work on the bands directly and assemble the result with merge().
+        # convert("RGBA") would copy the whole image first (even when it is already RGBA) only to have
+        # its alpha band replaced. RGB input is fully opaque, so it needs no alpha band at all.
+        if image.mode == 'RGB':
+            r, g, b = image.split()
+            a = None
+        else:
+            if image.mode != 'RGBA':
+                image = image.convert("RGBA")
+            r, g, b, a = image.split()
 
         r_target, g_target, b_target = target_color[:3]
         
@@ -351,10 +457,26 @@ class ImageProcessor:
         # is significantly faster than inverting and multiplying (~30% speedup).
         # Match (mask=255): a - 255 = 0 (Transparent)
         # No match (mask=0): a - 0 = a (Original alpha preserved)
-        new_a = ImageChops.subtract(a, mask)
-        
-        image.putalpha(new_a)
-        return image
+        # For opaque RGB input (a = 255 everywhere) that is simply the inverted mask.
+        new_a = ImageChops.invert(mask) if a is None else ImageChops.subtract(a, mask)
+
+        return Image.merge("RGBA", (r, g, b, new_a))
+
+    @staticmethod
+    def create_preview(image: Image.Image, max_size: int = PREVIEW_MAX_SIZE, quality: int = 75) -> bytes:
+        """
+        Returns a small WEBP rendition of the image for on-screen previews.
+        """
+        # Bolt Optimization: Previews only need to look right on screen, so downscale with BILINEAR
+        # instead of LANCZOS and encode with the fastest WEBP method. The export path is unaffected.
+        scale = min(1.0, max_size / max(image.width, image.height))
+        if scale < 1.0:
+            size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+            image = image.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+
+        output = io.BytesIO()
+        image.save(output, format='WEBP', quality=quality, method=0)
+        return output.getvalue()
 
     @staticmethod
     def convert_to_svg(image: Image.Image, **kwargs: Any) -> str:
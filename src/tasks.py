@@ -1,16 +1,115 @@
 from processor import ImageProcessor
-from PIL import Image, UnidentifiedImageError
+from PIL import Image, UnidentifiedImageError, __version__ as PILLOW_VERSION
 import io
-from typing import Dict, Any, Union
-from logging_config import setup_logging
+import multiprocessing
+from typing import Dict, Any, Optional, Tuple, Union
+from logging_config import setup_logging, setup_worker_logging
 
 # Setup logger
 logger = setup_logging()
 
+# Pillow-SIMD (a drop-in replacement with SSE4/AVX2 resize, point and blend paths) tags its releases ".postN"
+PILLOW_BACKEND = "Pillow-SIMD" if ".post" in PILLOW_VERSION else "Pillow"
+
+# Log the active backend once for the server process, which also covers the inline single-image path.
+# Pool workers import this module too; they report it from init_worker once their logging goes to stderr.
+if multiprocessing.current_process().name == "MainProcess":
+    logger.info(f"Image backend: {PILLOW_BACKEND} {PILLOW_VERSION}")
+
 class SecurityError(ValueError):
     """Custom exception for security violations."""
     pass
 
+# Security: Pass explicitly allowed formats to Image.open to prevent Pillow from attempting to
+# use vulnerable/obscure decoders (like PCX, SGI, TIFF) on maliciously crafted files.
+# Note: HEIC is technically not in Pillow's OPEN dict, pillow_heif uses HEIF for both.
+ALLOWED_FORMATS = ['PNG', 'JPEG', 'BMP', 'WEBP', 'HEIF', 'AVIF']
+
+def init_worker() -> None:
+    """
+    Process pool initializer. Loads every registered Pillow plugin once per worker
+    so the first WEBP/AVIF/HEIF task does not pay for lazy plugin discovery.
+    Also routes the worker's log records to stderr so only the parent process writes app.log.
+    """
+    setup_worker_logging()
+    # Importing this module already registered the AVIF and HEIF openers via processor.
+    Image.init()
+    logger.info(f"Worker ready: {PILLOW_BACKEND} {PILLOW_VERSION}")
+
+def exceeds_dimension_limit(file_content: bytes) -> bool:
+    """
+    Checks an upload's header against ImageProcessor.MAX_IMAGE_DIMENSION without decoding pixels.
+
+    Files that cannot be identified return False; process_image_task reports those with a proper error.
+    """
+    try:
+        # Image.open only parses the header; no raster data is read here
+        with Image.open(io.BytesIO(file_content), formats=ALLOWED_FORMATS) as probe:
+            width, height = probe.size
+    except Image.DecompressionBombError:
+        return True
+    except Exception:
+        return False
+    return width > ImageProcessor.MAX_IMAGE_DIMENSION or height > ImageProcessor.MAX_IMAGE_DIMENSION
+
+def config_is_identity(config: Dict[str, Any]) -> bool:
+    """
+    Returns True if the configuration requests no pixel edits at all (only an encode to the output format).
+    """
+    return (
+        not (config.get('rotate', 0) % 360 or config.get('flip_h', False) or config.get('flip_v', False) or config.get('grayscale', False))
+        and config.get('crop_mode', 'None') == "None"
+        and config.get('resize_type', 'None') == "None"
+        and (config.get('brightness', 1.0), config.get('contrast', 1.0),
+             config.get('sharpness', 1.0), config.get('saturation', 1.0)) == (1.0, 1.0, 1.0, 1.0)
+        and config.get('filter_type', 'None') == "None"
+        and config.get('pixel_size', 1) <= 1
+        and not config.get('replace_color', False)
+        and not config.get('watermark_text')
+    )
+
+def _can_pass_through(source_format: Optional[str], config: Dict[str, Any]) -> bool:
+    """
+    Returns True if the configuration leaves the pixels untouched and re-encoding could only
+    reproduce the upload, so the original bytes can be returned as the result.
+    """
+    output_format = config.get('output_format', 'JPEG')
+    # Only lossless sources: re-encoding a JPEG/WEBP/AVIF at the chosen quality is a real (size-reducing) edit
+    if output_format != source_format or output_format not in ('PNG', 'BMP'):
+        return False
+    # Stripping metadata or optimizing the PNG encoder changes the file even without pixel edits
+    if output_format == 'PNG' and (config.get('strip_metadata', True) or config.get('optimize_encoding', False)):
+        return False
+    return config_is_identity(config)
+
+def _get_draft_size(image_size: Tuple[int, int], config: Dict[str, Any], rotate: int = 0) -> Optional[Tuple[int, int]]:
+    """
+    Returns the minimum size a JPEG may be decoded at without degrading the requested downscale,
+    or None if the configuration does not shrink the image. rotate must already be normalized to 0-359.
+    """
+    # Crop coordinates refer to full-resolution pixels, so the decode size must not change
+    if config.get('crop_mode', 'None') != "None":
+        return None
+
+    resize_type = config.get('resize_type', 'None')
+    if resize_type == "Percentage":
+        percentage = config.get('percentage')
+        if not percentage or percentage >= 100:
+            return None
+        target = (int(image_size[0] * percentage / 100), int(image_size[1] * percentage / 100))
+    elif resize_type == "Fixed Dimensions":
+        width = config.get('width')
+        height = config.get('height')
+        if not width or not height:
+            return None
+        # The target box applies after rotation, the decoder works in file orientation
+        target = (height, width) if rotate in (90, 270) else (width, height)
+    else:
+        return None
+
+    # Keep a 2x margin for the final Lanczos pass (same reducing_gap Image.thumbnail uses)
+    return (max(1, target[0] * 2), max(1, target[1] * 2))
+
 def process_image_task(file_content: bytes, config: Dict[str, Any]) -> Dict[str, Any]:
     """
     Worker function to process a single image.
@@ -19,24 +118,22 @@ def process_image_task(file_content: bytes, config: Dict[str, Any]) -> Dict[str,
         config (dict): Configuration dictionary containing processing parameters.
     Returns:
         dict: On success, a dictionary containing:
+            - success (bool): True.
             - original_size (int): Size of the original file in bytes.
             - original_dimensions (tuple[int, int]): Width and height of the original image.
             - processed_size (int): Size of the processed image in bytes.
-            - data (io.BytesIO): In-memory binary stream of the processed image.
-            - image (PIL.Image.Image): The processed PIL image.
-            - original_image (PIL.Image.Image): A copy of the original PIL image.
+            - data (bytes): The encoded processed image (the upload itself when it passes through unchanged).
+            - original_preview (bytes): Downscaled WEBP rendition of the original for display.
+            - processed_preview (bytes or None): Display rendition of the output (None for SVG).
             - has_transparency (bool): Whether the original image has transparency.
+            - dominant_colors (list[str]): Hex colors of the original, empty unless extract_colors is set.
+            - histogram_data (dict or None): Per-channel histogram of the processed image, if show_histogram is set.
         On failure, a dictionary containing:
             - success (bool): False.
             - error (str): Error message.
     """
     try:
-        # Security: Validate Image Format BEFORE full processing
-        # Pass explicitly allowed formats to Image.open to prevent Pillow from attempting to
-        # use vulnerable/obscure decoders (like PCX, SGI, TIFF) on maliciously crafted files.
-        # Note: HEIC is technically not in Pillow's OPEN dict, pillow_heif uses HEIF for both.
-        ALLOWED_FORMATS = ['PNG', 'JPEG', 'BMP', 'WEBP', 'HEIF', 'AVIF']
-
+        # Security: Validate Image Format BEFORE full processing (see ALLOWED_FORMATS)
         # Load Image from bytes with format restrictions
         image = Image.open(io.BytesIO(file_content), formats=ALLOWED_FORMATS)
 
@@ -50,9 +147,22 @@ def process_image_task(file_content: bytes, config: Dict[str, Any]) -> Dict[str,
         original_size = len(file_content)  # Size in bytes of the original uploaded file content
         # App uses uploaded_file.size for original_size (bytes); here we derive it from the raw file bytes.
         original_dimensions = image.size
+        source_format = image.format
+        # Normalize once so equivalent angles (-90, 450) take the same paths as their 0-359 counterparts
+        rotate = config.get('rotate', 0) % 360
         
         logger.info(f"Processing image: Size={original_size} bytes, Dimensions={original_dimensions}")
 
+        # Bolt Optimization: When a JPEG is being downscaled, let libjpeg decode directly at 1/2, 1/4 or 1/8
+        # scale (DCT-domain scaling). This skips most of the IDCT work and never materializes the full raster.
+        # Must run before anything forces the image to load.
+        drafted = False
+        if image.format == 'JPEG':
+            draft_size = _get_draft_size(original_dimensions, config, rotate)
+            if draft_size:
+                image.draft(None, draft_size)
+                drafted = image.size != original_dimensions
+
         # Extract Dominant Colors (if requested) - Calculate on original image
         dominant_colors = []
         if config.get('extract_colors', False):
@@ -61,19 +171,22 @@ def process_image_task(file_content: bytes, config: Dict[str, Any]) -> Dict[str,
         # Check transparency - Check on original image
         original_has_transparency = ImageProcessor.has_transparency(image)
 
+        # Bolt Optimization: Render the "Original" preview here, while the image is already decoded,
+        # so the UI never has to keep (or stream) the full-resolution upload.
+        original_preview = ImageProcessor.create_preview(image)
+
         # Process
         # Bolt Optimization: Move Transform, Crop, and Resize BEFORE pixel-wise operations
         # (Enhancements, Filters, Pixelate, Watermark) to reduce the number of pixels
         # processed in those expensive operations, yielding significant speedups.
         
         # Transforms (fast, might change dimensions e.g. rotate 90)
-        image = ImageProcessor.apply_transforms(
-            image,
-            config.get('rotate', 0),
-            config.get('flip_h', False),
-            config.get('flip_v', False),
-            config.get('grayscale', False)
-        )
+        # Bolt Optimization: Skip the stage entirely for the common "just re-encode" workflow.
+        flip_h = config.get('flip_h', False)
+        flip_v = config.get('flip_v', False)
+        grayscale = config.get('grayscale', False)
+        if rotate or flip_h or flip_v or grayscale:
+            image = ImageProcessor.apply_transforms(image, rotate, flip_h, flip_v, grayscale)
 
         # Crop (must apply to original/rotated dimensions, not resized)
         crop_mode = config.get('crop_mode', 'None')
@@ -100,7 +213,15 @@ def process_image_task(file_content: bytes, config: Dict[str, Any]) -> Dict[str,
 
         # Resize (reduce number of pixels for subsequent operations)
         resize_type = config.get('resize_type', 'None')
-        if resize_type != "None":
+        if resize_type == "Percentage" and drafted:
+            # The percentage refers to the original dimensions, not the reduced decode size
+            scale = config.get('percentage') / 100
+            target_w = int(original_dimensions[0] * scale)
+            target_h = int(original_dimensions[1] * scale)
+            if rotate in (90, 270):
+                target_w, target_h = target_h, target_w
+            image = ImageProcessor.resize_image(image, width=target_w, height=target_h, maintain_aspect_ratio=False)
+        elif resize_type != "None":
             image = ImageProcessor.resize_image(
                 image,
                 width=config.get('width'),
@@ -110,13 +231,14 @@ def process_image_task(file_content: bytes, config: Dict[str, Any]) -> Dict[str,
             )
 
         # Enhancements & Filters (now running on potentially much smaller image)
-        image = ImageProcessor.apply_enhancements(
-            image,
+        enhancements = (
             config.get('brightness', 1.0),
             config.get('contrast', 1.0),
             config.get('sharpness', 1.0),
             config.get('saturation', 1.0)
         )
+        if enhancements != (1.0, 1.0, 1.0, 1.0):
+            image = ImageProcessor.apply_enhancements(image, *enhancements)
 
         filter_type = config.get('filter_type', 'None')
         if filter_type != "None":
@@ -156,7 +278,14 @@ def process_image_task(file_content: bytes, config: Dict[str, Any]) -> Dict[str,
         # Save/Optimize
         output_format = config.get('output_format', 'JPEG')
         
-        if output_format == 'SVG':
+        processed_preview = None
+        if _can_pass_through(source_format, config):
+             # Bolt Optimization: Nothing changed the pixels and the format is lossless, so the upload already
+             # is the result. Return it verbatim instead of re-encoding (and reuse the original preview).
+             processed_data = file_content
+             processed_size = len(processed_data)
+             processed_preview = original_preview
+        elif output_format == 'SVG':
              # Convert to SVG string then to bytes
              svg_content = ImageProcessor.convert_to_svg(image, **config)
              processed_data = svg_content.encode('utf-8')
@@ -173,6 +302,13 @@ def process_image_task(file_content: bytes, config: Dict[str, Any]) -> Dict[str,
              processed_data = output_io.getvalue()
              processed_size = len(processed_data)
 
+             # Bolt Optimization: Small outputs are shown as-is. Large ones are previewed from a downscaled copy of the
+             # *encoded* result (so compression artifacts stay visible) instead of streaming the full file on every rerun.
+             if max(image.size) > ImageProcessor.PREVIEW_MAX_SIZE:
+                 processed_preview = ImageProcessor.create_preview(Image.open(io.BytesIO(processed_data)))
+             else:
+                 processed_preview = processed_data
+
         # Performance Optimization (Bolt):
         # 1. Return raw bytes for 'data' instead of BytesIO to avoid cursor state issues and multiple .getvalue() calls.
         # 2. Do NOT return the processed PIL 'image'. It's large (uncompressed) and we can use 'data' (bytes) for display.
@@ -186,6 +322,8 @@ def process_image_task(file_content: bytes, config: Dict[str, Any]) -> Dict[str,
             "original_dimensions": original_dimensions,
             "processed_size": processed_size,
             "data": processed_data,
+            "original_preview": original_preview,
+            "processed_preview": processed_preview,
             # "original_image": original_image, # Bolt Optimization: Removed to save memory
             "has_transparency": original_has_transparency,
             "dominant_colors": dominant_colors,
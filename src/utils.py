@@ -1,7 +1,10 @@
 import os
 import re
 import uuid
-from typing import List, Tuple, Union, IO, Any
+import io
+import zipfile
+import functools
+from typing import List, Tuple, Union, IO, Any, Dict
 
 def sanitize_filename(filename: str) -> str:
     """
@@ -33,6 +36,16 @@ def format_bytes(size: float) -> str:
         return f"-{abs_size:.2f} {power_labels[n]}"
     return f"{abs_size:.2f} {power_labels[n]}"
 
+# The color pickers return the same few strings on every rerun
+@functools.lru_cache(maxsize=256)
+def hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
+    """
+    Converts a '#RRGGBB' color string (as returned by st.color_picker) to an (R, G, B) tuple.
+    """
+    # Parse once and unpack with bit operations instead of three int(..., 16) slices
+    packed = int(hex_color.lstrip('#'), 16)
+    return ((packed >> 16) & 0xFF, (packed >> 8) & 0xFF, packed & 0xFF)
+
 def get_unique_filename(original_filename: str, output_dir: str, suffix: str = "processed") -> str:
     # Sanitize the original filename to prevent path traversal and cross-platform issues
     safe_filename = sanitize_filename(original_filename)
@@ -106,3 +119,30 @@ def validate_upload_constraints(files: List[Any], max_count: int = 50, max_total
         return False, f"Total upload size ({total_size_mb:.1f} MB) exceeds limit of {max_total_size_mb} MB."
 
     return True, None
+
+def create_zip_archive(items: List[Dict[str, Any]]) -> bytes:
+    """
+    Packs processed images into an in-memory ZIP archive.
+
+    Args:
+        items (list): Result dicts with 'name', 'data' (bytes) and 'output_format' keys.
+
+    Returns:
+        bytes: The ZIP archive.
+    """
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w") as zf:
+        for item in items:
+            # Security: Sanitize filename to prevent zip slip/path traversal
+            name_stem = item.get('name_stem') or get_safe_filename_stem(item['name'])
+            # Use the item's output format to ensure extension matches content
+            output_format = item.get('output_format', 'JPEG')
+            file_name = f"processed_{name_stem}.{output_format.lower()}"
+            # Bolt Optimization: Outputs are already compressed (WEBP/AVIF/JPEG/PNG), so store them as-is.
+            # Deflating entropy-coded data burns CPU for no size benefit. BMP and SVG are uncompressed,
+            # so a fast deflate pass (level 1) still shrinks those considerably.
+            if output_format in ('BMP', 'SVG'):
+                zf.writestr(file_name, item['data'], compress_type=zipfile.ZIP_DEFLATED, compresslevel=1)
+            else:
+                zf.writestr(file_name, item['data'], compress_type=zipfile.ZIP_STORED)
+    return zip_buffer.getvalue()
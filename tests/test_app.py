@@ -26,7 +26,7 @@ mock_st.expander.return_value.__enter__.return_value = MagicMock()
 mock_st.spinner.return_value.__enter__.return_value = MagicMock()
 
 # Now we can import app
-from src.app import main
+from src.app import main, iter_completed_results, submit_to_pool
 
 @pytest.fixture(autouse=True)
 def reset_st():
@@ -49,6 +49,7 @@ def reset_st():
     mock_st.color_picker.return_value = "#FFFFFF"
     mock_st.slider.return_value = 1
     mock_st.button.return_value = False
+    mock_st.selectbox.return_value = 0
   
 def test_app_initial_render():
     """Test that the app renders the initial state correctly."""
@@ -66,7 +67,7 @@ def test_app_initial_render():
     mock_st.markdown.assert_any_call("### 👋 Welcome to Image Processor!")
 
 @patch("src.app.validate_upload_constraints")
-@patch("src.app.ThreadPoolExecutor")
+@patch("src.app.get_process_pool")
 def test_app_process_flow(mock_executor, mock_validate):
     """Test the image processing flow."""
     # Setup inputs
@@ -85,26 +86,22 @@ def test_app_process_flow(mock_executor, mock_validate):
         return False
     mock_st.button.side_effect = button_side_effect
 
-    # Mock executor
-    mock_future = MagicMock()
-    mock_future.result.return_value = {
+    # A single image is processed inline, without the shared process pool
+    with patch("src.app.process_image_task", return_value={
         "success": True,
         "processed_size": 500,
         "data": b"processed_data",
+        "original_preview": b"preview",
         "has_transparency": False,
         "dominant_colors": ["#FFFFFF"],
         "histogram_data": {"Red": [0]*256},
         "error": None
-    }
-    
-    # Mock context manager for executor
-    mock_executor_instance = mock_executor.return_value.__enter__.return_value
-    mock_executor_instance.submit.return_value = mock_future
-    
-    # We need to mock as_completed to yield our future
-    with patch("src.app.as_completed", return_value=[mock_future]):
+    }) as mock_task:
         main()
-    
+
+    mock_task.assert_called_once()
+    mock_executor.assert_not_called()
+
     # Validation should be called
     mock_validate.assert_called_once()
     
@@ -115,6 +112,109 @@ def test_app_process_flow(mock_executor, mock_validate):
     assert mock_st.session_state["processed_images"] is not None
     assert len(mock_st.session_state["processed_images"]) == 1
     assert mock_st.session_state["processed_images"][0]["name"] == "test.jpg"
+    assert mock_st.session_state["processed_images"][0]["name_stem"] == "test"
+
+    # Totals are cached alongside the results
+    assert mock_st.session_state["processed_totals"] == (len(b"fake_image_data"), 500)
+
+@patch("src.app.validate_upload_constraints")
+@patch("src.app.get_process_pool")
+def test_app_duplicate_uploads_processed_once(mock_executor, mock_validate):
+    """Test that identical uploads are processed once and fanned out to each filename."""
+    files = []
+    for name, content in (("a.jpg", b"same_image_data"), ("b.jpg", b"same_image_data"), ("c.jpg", b"other_image_data")):
+        mock_file = MagicMock()
+        mock_file.name = name
+        mock_file.size = 1024
+        mock_file.getvalue.return_value = content
+        files.append(mock_file)
+
+    mock_st.file_uploader.return_value = files
+    mock_validate.return_value = (True, "")
+    mock_st.button.side_effect = lambda label, **kwargs: "Process" in label
+
+    def make_future(*args):
+        mock_future = MagicMock()
+        mock_future.result.return_value = {
+            "success": True,
+            "processed_size": 500,
+            "data": b"processed_data",
+            "original_preview": b"preview",
+            "has_transparency": False,
+            "error": None
+        }
+        return mock_future
+    mock_executor_instance = mock_executor.return_value
+    mock_executor_instance.submit.side_effect = make_future
+
+    with patch("src.app.as_completed", side_effect=lambda futures: list(futures)):
+        main()
+
+    # Two distinct payloads go through the pool, the duplicate is not resubmitted
+    assert mock_executor_instance.submit.call_count == 2
+    names = sorted(item["name"] for item in mock_st.session_state["processed_images"])
+    assert names == ["a.jpg", "b.jpg", "c.jpg"]
+
+@patch("src.app.exceeds_dimension_limit", return_value=True)
+@patch("src.app.validate_upload_constraints")
+@patch("src.app.get_process_pool")
+def test_app_all_uploads_rejected_skips_pool(mock_executor, mock_validate, mock_exceeds):
+    """Test that no pool is started when every upload fails the header probe."""
+    mock_file = MagicMock()
+    mock_file.name = "huge.png"
+    mock_file.getvalue.return_value = b"huge_image_data"
+
+    mock_st.file_uploader.return_value = [mock_file, mock_file]
+    mock_validate.return_value = (True, "")
+    mock_st.button.side_effect = lambda label, **kwargs: "Process" in label
+
+    with patch("src.app.process_image_task") as mock_task:
+        main()
+
+    mock_executor.assert_not_called()
+    mock_task.assert_not_called()
+    assert mock_st.error.call_count == 2
+    assert mock_st.session_state["processed_images"] == []
+    # The run still falls through to the shared bookkeeping
+    assert mock_st.session_state["processed_totals"] == (0, 0)
+
+@patch("src.app.get_process_pool")
+def test_broken_pool_is_shut_down_once(mock_get_pool):
+    """Test that a crashed worker shuts the broken executor down before it is dropped from the cache."""
+    from concurrent.futures import Future
+    from concurrent.futures.process import BrokenProcessPool
+
+    future_to_files = {}
+    for name in ("a.jpg", "b.jpg"):
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker died"))
+        future_to_files[future] = [(name, 10)]
+    executor = MagicMock()
+
+    results = list(iter_completed_results(executor, future_to_files))
+
+    assert sorted(files[0][0] for files, _ in results) == ["a.jpg", "b.jpg"]
+    assert all(not result["success"] for _, result in results)
+    executor.shutdown.assert_called_once_with(wait=False, cancel_futures=True)
+    mock_get_pool.clear.assert_called_once()
+
+@patch("src.app.get_process_pool")
+def test_submit_rebuilds_pool_broken_before_submit(mock_get_pool):
+    """Test that a pool which broke while idle is replaced instead of failing every later run."""
+    from concurrent.futures.process import BrokenProcessPool
+
+    broken, healthy = MagicMock(), MagicMock()
+    broken.submit.side_effect = BrokenProcessPool("A child process terminated abruptly")
+    healthy.submit.side_effect = lambda *args: MagicMock()
+    mock_get_pool.side_effect = [broken, healthy]
+
+    executor, future_to_files = submit_to_pool([(b"a", [("a.jpg", 1)]), (b"b", [("b.jpg", 1)])], {})
+
+    assert executor is healthy
+    assert healthy.submit.call_count == 2
+    assert sorted(files[0][0] for files in future_to_files.values()) == ["a.jpg", "b.jpg"]
+    broken.shutdown.assert_called_once_with(wait=False, cancel_futures=True)
+    mock_get_pool.clear.assert_called_once()
 
 @patch("src.app.validate_upload_constraints")
 def test_app_validation_failure(mock_validate):
@@ -169,7 +269,7 @@ def test_results_display():
         "original_size": 1000,
         "processed_size": 500,
         "data": b"processed",
-        "original_data": b"orig",
+        "original_preview": b"orig",
         "has_transparency": False,
         "dominant_colors": ["#FFFFFF"]
     }]
@@ -189,3 +289,29 @@ def test_results_display():
     # Should show download button
     mock_st.download_button.assert_called()
 
+def test_results_display_shows_selected_item_only():
+    """Test that a batch is summarized in one table and only the selected result is detailed."""
+    mock_st.file_uploader.return_value = []
+    mock_st.session_state["processed_images"] = [
+        {
+            "name": name,
+            "original_size": 1000,
+            "processed_size": 500,
+            "data": data,
+            "original_preview": b"orig",
+            "has_transparency": False,
+        }
+        for name, data in (("a.jpg", b"a-processed"), ("b.jpg", b"b-processed"))
+    ]
+    mock_st.selectbox.return_value = 1
+
+    main()
+
+    rows = mock_st.dataframe.call_args[0][0]
+    assert [row["File"] for row in rows] == ["a.jpg", "b.jpg"]
+    assert rows[0]["Savings"] == "50.0%"
+
+    item_downloads = [c for c in mock_st.download_button.call_args_list if c.kwargs["label"] != "Download All as ZIP"]
+    assert len(item_downloads) == 1
+    assert item_downloads[0].kwargs["data"] == b"b-processed"
+    assert item_downloads[0].kwargs["file_name"] == "processed_b.jpeg"
@@ -82,6 +82,15 @@ def test_replace_color_with_transparency():
     _, _, _, a2 = result2.split()
     assert a2.getextrema() == (0, 0)
 
+def test_replace_color_preserves_existing_alpha():
+    # Non-matching pixels keep their alpha; the input image is left untouched
+    img = Image.new('RGBA', (2, 1), color=(255, 0, 0, 200))
+    img.putpixel((1, 0), (0, 0, 255, 100))
+    result = ImageProcessor.replace_color_with_transparency(img, (255, 0, 0), tolerance=0)
+    assert result.getpixel((0, 0)) == (255, 0, 0, 0)
+    assert result.getpixel((1, 0)) == (0, 0, 255, 100)
+    assert img.getpixel((0, 0)) == (255, 0, 0, 200)
+
 def test_convert_to_svg(base_image):
     with patch('vtracer.convert_raw_image_to_svg') as mock_vtracer:
         
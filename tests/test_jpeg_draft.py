@@ -0,0 +1,66 @@
+import unittest
+from PIL import Image
+import io
+from unittest.mock import patch
+from src.tasks import process_image_task, _get_draft_size
+from src.processor import ImageProcessor
+
+class TestJpegDraft(unittest.TestCase):
+    def setUp(self):
+        img = Image.linear_gradient('L').convert('RGB').resize((1600, 1200))
+        buf = io.BytesIO()
+        img.save(buf, format='JPEG')
+        self.content = buf.getvalue()
+
+    def _output_size(self, config):
+        result = process_image_task(self.content, dict(config, output_format='PNG'))
+        self.assertTrue(result['success'], result.get('error'))
+        return Image.open(io.BytesIO(result['data'])).size
+
+    def test_draft_size_only_for_downscale(self):
+        self.assertIsNone(_get_draft_size((1600, 1200), {'resize_type': 'None'}))
+        self.assertIsNone(_get_draft_size((1600, 1200), {'resize_type': 'Percentage', 'percentage': 150}))
+        self.assertIsNone(_get_draft_size((1600, 1200), {
+            'resize_type': 'Percentage', 'percentage': 25, 'crop_mode': 'Custom Box'
+        }))
+        self.assertEqual(_get_draft_size((1600, 1200), {'resize_type': 'Percentage', 'percentage': 25}), (800, 600))
+
+    def test_draft_size_respects_rotation(self):
+        config = {'resize_type': 'Fixed Dimensions', 'width': 100, 'height': 300}
+        self.assertEqual(_get_draft_size((1600, 1200), config, 90), (600, 200))
+        self.assertEqual(_get_draft_size((1600, 1200), config), (200, 600))
+
+    def test_decoder_scales_down_before_resize(self):
+        with patch('src.tasks.ImageProcessor.resize_image', wraps=ImageProcessor.resize_image) as mock_resize:
+            self._output_size({'resize_type': 'Percentage', 'percentage': 10})
+        decoded = mock_resize.call_args[0][0]
+        self.assertEqual(decoded.size, (400, 300))
+
+    def test_percentage_resize_matches_original_dimensions(self):
+        size = self._output_size({'resize_type': 'Percentage', 'percentage': 10})
+        self.assertEqual(size, (160, 120))
+
+    def test_percentage_resize_with_rotation(self):
+        size = self._output_size({'resize_type': 'Percentage', 'percentage': 10, 'rotate': 90})
+        self.assertEqual(size, (120, 160))
+
+    def test_percentage_resize_with_equivalent_rotation(self):
+        # -90 and 450 are quarter turns too; the target must swap just like for 270 and 90
+        for rotate in (-90, 450):
+            size = self._output_size({'resize_type': 'Percentage', 'percentage': 10, 'rotate': rotate})
+            self.assertEqual(size, (120, 160), rotate)
+
+    def test_fixed_dimensions_resize(self):
+        size = self._output_size({
+            'resize_type': 'Fixed Dimensions', 'width': 200, 'height': 100, 'maintain_aspect': False
+        })
+        self.assertEqual(size, (200, 100))
+
+    def test_original_dimensions_reported_before_draft(self):
+        result = process_image_task(self.content, {
+            'resize_type': 'Percentage', 'percentage': 10, 'output_format': 'PNG'
+        })
+        self.assertEqual(result['original_dimensions'], (1600, 1200))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,8 @@
 import unittest
 from unittest.mock import MagicMock, patch
-from src.tasks import process_image_task
+import io
+from PIL import Image
+from src.tasks import process_image_task, exceeds_dimension_limit
 from src.processor import ImageProcessor
 
 class TestLargeImageSecurity(unittest.TestCase):
@@ -36,5 +38,19 @@ class TestLargeImageSecurity(unittest.TestCase):
         self.assertFalse(result['success'], "Should have failed due to large image dimensions")
         self.assertIn("exceed maximum allowed size", result['error'])
 
+    def test_header_probe_flags_oversized_image(self):
+        """
+        Test that the pre-dispatch probe rejects oversized images from the header alone.
+        """
+        def png_bytes(size):
+            buf = io.BytesIO()
+            Image.new('L', size).save(buf, format='PNG')
+            return buf.getvalue()
+
+        self.assertTrue(exceeds_dimension_limit(png_bytes((ImageProcessor.MAX_IMAGE_DIMENSION + 1, 1))))
+        self.assertFalse(exceeds_dimension_limit(png_bytes((100, 100))))
+        # Unreadable content is left for process_image_task to report
+        self.assertFalse(exceeds_dimension_limit(b'not an image'))
+
 if __name__ == '__main__':
     unittest.main()
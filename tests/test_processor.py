@@ -3,6 +3,7 @@ from PIL import Image
 import io
 import os
 import sys
+from unittest.mock import patch
 
 # Add src to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
@@ -39,6 +40,32 @@ class TestImageProcessor(unittest.TestCase):
         rotated = ImageProcessor.apply_transforms(img, rotate=90)
         self.assertEqual(rotated.size, (50, 100))
 
+    def test_transforms_combined_match_sequential(self):
+        # Every rotate/flip combination collapses to one transpose; it must match applying the steps in order
+        img = Image.linear_gradient('L').resize((4, 3))
+        img.putpixel((0, 0), 7)
+        steps = {90: Image.Transpose.ROTATE_270, 180: Image.Transpose.ROTATE_180, 270: Image.Transpose.ROTATE_90}
+        for rotate in (0, 90, 180, 270):
+            for flip_h in (False, True):
+                for flip_v in (False, True):
+                    expected = img.transpose(steps[rotate]) if rotate else img
+                    if flip_h:
+                        expected = expected.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+                    if flip_v:
+                        expected = expected.transpose(Image.Transpose.FLIP_TOP_BOTTOM)
+                    result = ImageProcessor.apply_transforms(img, rotate, flip_h, flip_v)
+                    self.assertEqual(result.size, expected.size)
+                    self.assertEqual(result.tobytes(), expected.tobytes(), (rotate, flip_h, flip_v))
+
+    def test_transforms_rotate_normalizes_angle(self):
+        # Negative and over-full turns are equivalent to their 0-359 counterparts and stay lossless
+        img = Image.linear_gradient('L').resize((4, 3))
+        for rotate, equivalent in ((-90, 270), (450, 90), (-180, 180), (360, 0)):
+            result = ImageProcessor.apply_transforms(img, rotate=rotate)
+            expected = ImageProcessor.apply_transforms(img, rotate=equivalent)
+            self.assertEqual(result.size, expected.size)
+            self.assertEqual(result.tobytes(), expected.tobytes(), rotate)
+
     def test_transforms_flip(self):
         # Create an image with distinct quadrants to test flipping
         img = Image.new('RGB', (2, 2))
@@ -54,6 +81,25 @@ class TestImageProcessor(unittest.TestCase):
         # Original (0,0) Red should move to (0,1)
         self.assertEqual(flipped_v.getpixel((0, 1)), (255, 0, 0))
 
+    def test_has_transparency(self):
+        self.assertFalse(ImageProcessor.has_transparency(self.img))
+        self.assertTrue(ImageProcessor.has_transparency(Image.new('RGBA', (4, 4))))
+        self.assertTrue(ImageProcessor.has_transparency(Image.new('PA', (4, 4))))
+        palette = Image.new('P', (4, 4))
+        self.assertFalse(ImageProcessor.has_transparency(palette))
+        palette.info['transparency'] = 0
+        self.assertTrue(ImageProcessor.has_transparency(palette))
+
+    def test_resize_same_size_is_noop(self):
+        self.assertIs(ImageProcessor.resize_image(self.img, percentage=100), self.img)
+
+    def test_resize_uses_configured_filter(self):
+        img = Image.linear_gradient('L').resize((64, 64))
+        with patch.object(ImageProcessor, 'RESAMPLING_FILTER', Image.Resampling.BICUBIC):
+            resized = ImageProcessor.resize_image(img, width=20, height=30, maintain_aspect_ratio=False)
+        expected = img.resize((20, 30), Image.Resampling.BICUBIC, reducing_gap=2.0)
+        self.assertEqual(resized.tobytes(), expected.tobytes())
+
     def test_crop_image(self):
         # 100x100 image
         cropped = ImageProcessor.crop_image(self.img, 10, 10, 90, 90)
@@ -64,6 +110,9 @@ class TestImageProcessor(unittest.TestCase):
         cropped = ImageProcessor.center_crop_to_aspect(img, 1, 1)
         self.assertEqual(cropped.size, (100, 100))
 
+        # Matching ratio (4:2 == 2:1) is returned as-is
+        self.assertIs(ImageProcessor.center_crop_to_aspect(img, 4, 2), img)
+
     def test_transforms_grayscale(self):
         gray = ImageProcessor.apply_transforms(self.img, grayscale=True)
         # Bolt Optimization: grayscale=True now returns 'L' mode directly
@@ -150,11 +199,36 @@ class TestImageProcessor(unittest.TestCase):
         pixel_dark = dark.getpixel((50, 50))
         self.assertTrue(pixel_dark[0] < 100)
 
+    def test_enhancements_identity_returns_input(self):
+        self.assertIs(ImageProcessor.apply_enhancements(self.img), self.img)
+
     def test_enhancements_run(self):
         # Just ensure it runs without error, verifying visual output programmatically is hard
         enhanced = ImageProcessor.apply_enhancements(self.img, brightness=1.5, contrast=0.5)
         self.assertIsInstance(enhanced, Image.Image)
 
+    def test_enhancements_match_imageenhance(self):
+        from PIL import ImageChops, ImageEnhance
+        gradient = Image.linear_gradient('L').resize((64, 48))
+        rgb = Image.merge('RGB', (gradient, gradient.rotate(90), Image.radial_gradient('L').resize((64, 48))))
+        rgba = rgb.copy()
+        rgba.putalpha(gradient)
+
+        for img in (gradient, rgb, rgba):
+            expected = ImageEnhance.Brightness(img).enhance(1.3)
+            expected = ImageEnhance.Contrast(expected).enhance(0.7)
+            expected = ImageEnhance.Color(expected).enhance(1.5)
+            result = ImageProcessor.apply_enhancements(img, brightness=1.3, contrast=0.7, saturation=1.5)
+
+            self.assertEqual(result.mode, img.mode)
+            # Rounding may differ by a level or two; alpha must be untouched
+            extrema = ImageChops.difference(result, expected).getextrema()
+            if img.mode == 'L':
+                extrema = (extrema,)
+            self.assertLessEqual(max(high for _, high in extrema), 2)
+            if img.mode == 'RGBA':
+                self.assertEqual(result.getchannel('A').tobytes(), img.getchannel('A').tobytes())
+
     def test_get_dominant_colors(self):
         # Create an image with clear dominant colors
         img = Image.new('RGB', (100, 100), color='red')
@@ -171,6 +245,17 @@ class TestImageProcessor(unittest.TestCase):
         self.assertIn('#ff0000', colors)
         self.assertIn('#0000ff', colors)
 
+    def test_create_preview(self):
+        img = Image.new('RGBA', (3000, 1500), (255, 0, 0, 128))
+        preview = Image.open(io.BytesIO(ImageProcessor.create_preview(img, max_size=1024)))
+        self.assertEqual(preview.format, 'WEBP')
+        self.assertEqual(preview.size, (1024, 512))
+        self.assertEqual(preview.mode, 'RGBA')
+
+        # Small images are never upscaled
+        small = Image.open(io.BytesIO(ImageProcessor.create_preview(self.img, max_size=1024)))
+        self.assertEqual(small.size, (100, 100))
+
     def test_watermark_length_limit(self):
         """
         Test that add_watermark raises ValueError for excessively long strings.
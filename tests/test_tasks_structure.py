@@ -3,11 +3,12 @@ from PIL import Image
 import io
 import os
 import sys
+import logging
 
 # Add src to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
 
-from tasks import process_image_task
+from tasks import process_image_task, config_is_identity, init_worker
 
 class TestTasksStructure(unittest.TestCase):
     def test_process_image_task_structure(self):
@@ -31,6 +32,7 @@ class TestTasksStructure(unittest.TestCase):
         self.assertIn('original_dimensions', result)
         self.assertIn('processed_size', result)
         self.assertIn('data', result)
+        self.assertIn('original_preview', result)
         self.assertIn('has_transparency', result)
         self.assertIn('dominant_colors', result)
 
@@ -42,5 +44,73 @@ class TestTasksStructure(unittest.TestCase):
         self.assertIsInstance(result['dominant_colors'], list)
         self.assertTrue(len(result['dominant_colors']) > 0)
 
+    def test_processed_preview(self):
+        img_bytes = io.BytesIO()
+        Image.new('RGB', (2000, 1000), color='blue').save(img_bytes, format='PNG')
+
+        result = process_image_task(img_bytes.getvalue(), {'output_format': 'JPEG'})
+        self.assertTrue(result['success'])
+        preview = Image.open(io.BytesIO(result['processed_preview']))
+        self.assertEqual(preview.size, (1024, 512))
+
+        # Small outputs are previewed as-is
+        small_bytes = io.BytesIO()
+        Image.new('RGB', (100, 100), color='blue').save(small_bytes, format='PNG')
+        result = process_image_task(small_bytes.getvalue(), {'output_format': 'JPEG'})
+        self.assertIs(result['processed_preview'], result['data'])
+
+    def test_unedited_lossless_upload_passes_through(self):
+        img_bytes = io.BytesIO()
+        Image.new('RGB', (100, 100), color='green').save(img_bytes, format='PNG')
+        content = img_bytes.getvalue()
+
+        result = process_image_task(content, {'output_format': 'PNG', 'strip_metadata': False})
+        self.assertTrue(result['success'])
+        self.assertIs(result['data'], content)
+
+        # Any edit (or a metadata strip) forces a real re-encode
+        result = process_image_task(content, {'output_format': 'PNG', 'strip_metadata': False, 'rotate': 90})
+        self.assertIsNot(result['data'], content)
+        result = process_image_task(content, {'output_format': 'PNG'})
+        self.assertIsNot(result['data'], content)
+
+    def test_config_is_identity(self):
+        self.assertTrue(config_is_identity({'output_format': 'WEBP', 'quality': 50, 'brightness': 1.0}))
+        # A full turn leaves the pixels where they were
+        self.assertTrue(config_is_identity({'rotate': 360}))
+        self.assertFalse(config_is_identity({'rotate': -90}))
+        self.assertFalse(config_is_identity({'brightness': 1.2}))
+        self.assertFalse(config_is_identity({'resize_type': 'Percentage', 'percentage': 50}))
+        self.assertFalse(config_is_identity({'watermark_text': 'hi'}))
+
+    def test_pass_through_requires_identity_config(self):
+        img_bytes = io.BytesIO()
+        Image.new('RGB', (100, 100), color='green').save(img_bytes, format='BMP')
+        content = img_bytes.getvalue()
+        base = {'output_format': 'BMP'}
+
+        # Neutral values for the edit settings still count as "no edit"
+        result = process_image_task(content, dict(base, brightness=1.0, pixel_size=1))
+        self.assertIs(result['data'], content)
+
+        for edit in ({'brightness': 1.2}, {'resize_type': 'Percentage', 'percentage': 50}, {'watermark_text': 'hi'}):
+            result = process_image_task(content, dict(base, **edit))
+            self.assertTrue(result['success'])
+            self.assertIsNot(result['data'], content, edit)
+
+    def test_init_worker_logs_to_stderr_only(self):
+        # Pool workers must not share the parent's RotatingFileHandler on app.log
+        logger = logging.getLogger("ImageProcessor")
+        saved_handlers = list(logger.handlers)
+        try:
+            init_worker()
+            self.assertEqual([type(h) for h in logger.handlers], [logging.StreamHandler])
+            self.assertIs(logger.handlers[0].stream, sys.stderr)
+        finally:
+            for handler in list(logger.handlers):
+                logger.removeHandler(handler)
+            for handler in saved_handlers:
+                logger.addHandler(handler)
+
 if __name__ == '__main__':
     unittest.main()
@@ -6,7 +6,9 @@ from unittest.mock import patch
 # Add src to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
 
-from utils import format_bytes, get_unique_filename, get_file_info
+import io
+import zipfile
+from utils import format_bytes, get_unique_filename, get_file_info, create_zip_archive, hex_to_rgb
 
 class TestUtils(unittest.TestCase):
     
@@ -69,5 +71,22 @@ class TestUtils(unittest.TestCase):
         self.assertEqual(info['size_bytes'], 2048)
         self.assertEqual(info['size_formatted'], "2.00 KB")
 
+    def test_hex_to_rgb(self):
+        self.assertEqual(hex_to_rgb("#FFFFFF"), (255, 255, 255))
+        self.assertEqual(hex_to_rgb("#1a2B3c"), (26, 43, 60))
+        self.assertEqual(hex_to_rgb("000000"), (0, 0, 0))
+
+    def test_create_zip_archive(self):
+        items = [
+            {"name": "../photo.jpg", "data": b"webp-bytes", "output_format": "WEBP"},
+            {"name": "drawing.png", "data": b"<svg></svg>", "output_format": "SVG"},
+        ]
+
+        with zipfile.ZipFile(io.BytesIO(create_zip_archive(items))) as zf:
+            self.assertEqual(zf.namelist(), ["processed_photo.webp", "processed_drawing.svg"])
+            self.assertEqual(zf.getinfo("processed_photo.webp").compress_type, zipfile.ZIP_STORED)
+            self.assertEqual(zf.getinfo("processed_drawing.svg").compress_type, zipfile.ZIP_DEFLATED)
+            self.assertEqual(zf.read("processed_photo.webp"), b"webp-bytes")
+
 if __name__ == '__main__':
     unittest.main()
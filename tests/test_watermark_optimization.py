@@ -99,5 +99,14 @@ class TestWatermarkOptimization(unittest.TestCase):
 
         self.assertEqual(img_rgba.getpixel((90, 90)), original_pixel_rgba)
 
+    def test_palette_image_watermarked_in_rgb(self):
+        img_p = Image.new('RGB', (100, 100), color='white').convert('P')
+        result = ImageProcessor.add_watermark(img_p, "Test", color=(255, 0, 0), opacity=255)
+
+        self.assertEqual(result.mode, 'RGB')
+        self.assertEqual(img_p.mode, 'P')
+        # The red text survives instead of being mapped onto the palette
+        self.assertIn((255, 0, 0), [color for _, color in result.getcolors(10000)])
+
 if __name__ == '__main__':
     unittest.main()